@@ -6,9 +6,12 @@ import socket
 import urllib.parse
 import time
 import json
+import os
 import re
 from collections import Counter
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import export
+import thumbnails
 
 # ------------------ CONFIG ------------------
 IST = ZoneInfo("Asia/Kolkata")
@@ -39,6 +42,7 @@ if "settings" not in st.session_state:
     st.session_state.settings = {
         "view_mode": "list",
         "sentiment_analysis": True,
+        "thumbnails": False,
     }
 
 # ------------------ PROFESSIONAL CSS ------------------
@@ -151,6 +155,15 @@ st.markdown("""
         box-shadow: 0 4px 16px rgba(59, 130, 246, 0.1);
     }
     
+    .article-thumb {
+        float: right;
+        width: 160px;
+        height: 90px;
+        object-fit: cover;
+        border-radius: 6px;
+        margin-left: 16px;
+    }
+    
     .article-title {
         font-size: 18px;
         font-weight: 700;
@@ -365,7 +378,7 @@ with col5:
 st.markdown("<br>", unsafe_allow_html=True)
 
 # ------------------ QUICK ACTIONS ------------------
-col1, col2, col3, col4 = st.columns(4)
+col1, col2, col3, col4, col5, col6 = st.columns(6)
 
 with col1:
     if st.button("🔖 BOOKMARKS", use_container_width=True):
@@ -389,6 +402,17 @@ with col4:
         st.session_state.last_fetch = None
         st.rerun()
 
+with col5:
+    if st.button("📤 EXPORT", use_container_width=True):
+        st.session_state.show_export = not st.session_state.get("show_export", False)
+
+with col6:
+    images_on = st.session_state.settings["thumbnails"]
+    if st.button("🖼️ IMAGES ON" if images_on else "🖼️ IMAGES OFF", use_container_width=True,
+                 disabled=not thumbnails.AVAILABLE, help=None if thumbnails.AVAILABLE else "Requires Pillow"):
+        st.session_state.settings["thumbnails"] = not images_on
+        st.rerun()
+
 st.markdown("<br>", unsafe_allow_html=True)
 
 # ------------------ FILTERS ------------------
@@ -469,6 +493,13 @@ def analyze_sentiment(title, summary=""):
         return "🔴 Negative", "badge-sentiment-negative"
     return "⚪ Neutral", "badge-sentiment-neutral"
 
+def parse_published(entry):
+    try:
+        pub_utc = datetime(*entry.published_parsed[:6], tzinfo=UTC)
+        return pub_utc.astimezone(IST)
+    except:
+        return None
+
 def freshness_label(pub_time):
     delta = datetime.now(IST) - pub_time
     minutes = int(delta.total_seconds() / 60)
@@ -495,6 +526,8 @@ MARKET_FEEDS = [
     "https://www.moneycontrol.com/rss/marketreports.xml",
 ]
 
+FEED_GROUPS = {"Global": GLOBAL_FEEDS, "India": INDIA_FEEDS, "Markets": MARKET_FEEDS}
+
 # ------------------ BOOKMARKS VIEW ------------------
 if st.session_state.get("show_bookmarks", False):
     st.markdown("## 🔖 Bookmarks")
@@ -517,12 +550,72 @@ if st.session_state.get("show_bookmarks", False):
                     st.rerun()
     st.stop()
 
+# ------------------ EXPORT VIEW ------------------
+if st.session_state.get("show_export", False):
+    st.markdown("## 📤 Export")
+    st.caption("Uses the search and date filters above. Same as `python export.py` on the command line.")
+    e1, e2 = st.columns([2, 3])
+    with e1:
+        export_format = st.selectbox("Format", export.FORMATS, label_visibility="collapsed")
+    with e2:
+        incremental = st.checkbox("Only articles since the last export", value=True)
+    if st.button("EXPORT", use_container_width=True):
+        try:
+            path, count = export.export_articles(
+                fmt=export_format,
+                search_query=st.session_state.search_query,
+                filter_date=st.session_state.filter_date,
+                incremental=incremental,
+                consumer="ui",  # Separate position, so UI clicks don't consume the nightly job's rows
+            )
+            st.session_state.last_export = path
+            st.success(f"✨ {count} articles exported to {path}")
+        except (OSError, RuntimeError) as err:
+            st.error(f"Export failed: {err}")
+    last_export = st.session_state.get("last_export")
+    if last_export and os.path.exists(last_export):
+        # Streamlit holds downloads in memory, so large exports are only offered as a server path
+        if os.path.getsize(last_export) <= export.DOWNLOAD_MAX_BYTES:
+            with open(last_export, "rb") as f:
+                st.download_button("⬇️ Download", f, file_name=os.path.basename(last_export), use_container_width=True)
+        else:
+            st.info(f"📁 Too large to download here; the file is on the server at {os.path.abspath(last_export)}")
+    st.stop()
+
 # ------------------ TRENDING VIEW ------------------
 if st.session_state.get("show_trends", False):
     st.markdown("## 🔥 Trending")
     st.info("🚀 Trending analysis coming soon")
     st.stop()
 
+# ------------------ HISTORY ------------------
+def record_history():
+    """Record every parsed entry of every feed group for export, before any viewer filters"""
+    for cluster, feeds in FEED_GROUPS.items():
+        articles = []
+        for feed in fetch_all_feeds_parallel(feeds):  # Cached, shared with the tabs
+            for e in feed.entries[:15]:
+                pub_ist = parse_published(e)
+                title = getattr(e, 'title', None)
+                link = getattr(e, 'link', None)
+                if pub_ist is None or not title or not link:
+                    continue
+                summary = getattr(e, 'summary', '')
+                sentiment, _ = analyze_sentiment(title, summary)
+                articles.append({
+                    'time': pub_ist,
+                    'title': title,
+                    'link': link,
+                    'source': get_source(e),
+                    'summary': summary,
+                    'category': categorize_article(title, summary),
+                    'sentiment': sentiment,
+                })
+        try:
+            export.record_articles(articles, cluster)
+        except OSError:
+            pass  # Export bookkeeping must never take down the live feed
+
 # ------------------ RENDER NEWS (OPTIMIZED) ------------------
 def render_news(feeds, tab_name):
     REFRESH = 45  # Faster refresh - 45 seconds
@@ -537,6 +630,9 @@ def render_news(feeds, tab_name):
     
     st.session_state.last_fetch = now
     
+    # Only the first tab gets this far (each tab ends in st.rerun), so record all groups here
+    record_history()
+    
     # Fetch all feeds in parallel (MUCH FASTER)
     feed_results = fetch_all_feeds_parallel(feeds)
     
@@ -544,27 +640,18 @@ def render_news(feeds, tab_name):
     
     for feed in feed_results:
         for e in feed.entries[:15]:  # Limit to 15 per feed for speed
-            try:
-                if hasattr(e, 'published_parsed'):
-                    pub_utc = datetime(*e.published_parsed[:6], tzinfo=UTC)
-                else:
-                    continue
-                pub_ist = pub_utc.astimezone(IST)
-            except:
+            pub_ist = parse_published(e)
+            if pub_ist is None:
                 continue
             
             title = e.title
             summary = getattr(e, 'summary', '')
             
             # Filters
-            if st.session_state.search_query:
-                text = f"{title} {summary}".lower()
-                if st.session_state.search_query.lower() not in text:
-                    continue
-            
-            if st.session_state.filter_date:
-                if pub_ist.date() != st.session_state.filter_date:
-                    continue
+            if not export.matches_filters(title, summary, pub_ist,
+                                          st.session_state.search_query,
+                                          st.session_state.filter_date):
+                continue
             
             if e.link in st.session_state.seen:
                 continue
@@ -573,6 +660,12 @@ def render_news(feeds, tab_name):
             
             sentiment, sentiment_class = analyze_sentiment(title, summary)
             
+            # Only thumbnails cached before this render are shown. New ones download in the
+            # background and appear the next time the article is rendered (another viewer, REFRESH)
+            thumb_url = thumbnails.extract_url(e)
+            if st.session_state.settings["thumbnails"]:
+                thumbnails.request(thumb_url)
+            
             collected.append({
                 'time': pub_ist,
                 'title': title,
@@ -582,6 +675,7 @@ def render_news(feeds, tab_name):
                 'category': categorize_article(title, summary),
                 'sentiment': sentiment,
                 'sentiment_class': sentiment_class,
+                'thumbnail': thumb_url,
                 'is_read': e.link in st.session_state.read_articles,
                 'is_bookmarked': e.link in st.session_state.bookmarks
             })
@@ -612,8 +706,15 @@ def render_news(feeds, tab_name):
 def render_full(a):
     tag, age, tag_class = freshness_label(a['time'])
     
+    thumb = ""
+    if st.session_state.settings["thumbnails"]:
+        data_uri = thumbnails.get_data_uri(a['thumbnail'])
+        if data_uri:
+            thumb = f'<img class="article-thumb" src="{data_uri}">'
+    
     st.markdown(f"""
     <div class="article-card">
+        {thumb}
         <div class="article-title">{a['title']}</div>
         <div class="article-meta">
             <span class="badge badge-source">📰 {a['source']}</span>
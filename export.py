@@ -0,0 +1,277 @@
+"""Article history and streaming bulk export (JSONL / CSV / Parquet).
+
+Usage:
+    python export.py --format csv --output exports/news.csv
+    python export.py --format parquet --search india --date 2024-01-31 --full
+"""
+import argparse
+import csv
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, date
+from itertools import islice
+from zoneinfo import ZoneInfo
+
+# ------------------ CONFIG ------------------
+IST = ZoneInfo("Asia/Kolkata")
+DATA_DIR = os.environ.get("NEWS_DATA_DIR", "data")
+HISTORY_PATH = os.path.join(DATA_DIR, "history.jsonl")
+STATE_PATH = os.path.join(DATA_DIR, "export_state.json")
+EXPORT_DIR = "exports"
+DOWNLOAD_MAX_BYTES = 20 * 1024 * 1024  # Larger exports stay on the server, not in the browser
+BATCH_SIZE = 500
+RECENT_LINKS = 5000  # Dedupe window; feeds only carry their latest few dozen items
+FORMATS = ("jsonl", "csv", "parquet")
+
+FIELDS = [
+    "link", "title", "summary", "source", "category",
+    "sentiment", "cluster", "published", "recorded_at",
+]
+
+_history_lock = threading.Lock()
+_recent_links = {}  # History path -> recently recorded links (oldest first)
+
+# ------------------ FILTERS ------------------
+def matches_filters(title, summary, pub_time, search_query="", filter_date=None):
+    """Same search/date criteria used by the news tabs"""
+    if search_query:
+        text = f"{title} {summary}".lower()
+        if search_query.lower() not in text:
+            return False
+    if filter_date and pub_time.date() != filter_date:
+        return False
+    return True
+
+# ------------------ HISTORY ------------------
+def _load_recent_links(path):
+    """Links from the tail of the history file, so restarts don't re-record live items"""
+    links = OrderedDict()
+    if not os.path.exists(path):
+        return links
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(size - RECENT_LINKS * 1024, 0))
+        if f.tell():
+            f.readline()  # Skip the partial first line
+        for line in f:
+            try:
+                links[json.loads(line)['link']] = None
+            except (ValueError, KeyError, TypeError):
+                continue
+    while len(links) > RECENT_LINKS:
+        links.popitem(last=False)
+    return links
+
+def record_articles(articles, cluster, path=HISTORY_PATH):
+    """Append newly seen articles to the history file (one JSON object per line).
+
+    Safe to call from concurrent sessions: dedupe and append share one lock.
+    """
+    recorded_at = datetime.now(IST).isoformat()
+    with _history_lock:
+        if path not in _recent_links:
+            _recent_links[path] = _load_recent_links(path)
+        recent = _recent_links[path]
+
+        lines = []
+        for a in articles:
+            if a['link'] in recent:
+                continue
+            recent[a['link']] = None
+            lines.append(json.dumps({
+                'link': a['link'],
+                'title': a['title'],
+                'summary': a['summary'],
+                'source': a['source'],
+                'category': a['category'],
+                'sentiment': a['sentiment'].split()[-1],  # Drop the emoji
+                'cluster': cluster,
+                'published': a['time'].isoformat(),
+                'recorded_at': recorded_at,
+            }, ensure_ascii=False) + "\n")
+        while len(recent) > RECENT_LINKS:
+            recent.popitem(last=False)
+        if not lines:
+            return 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+    return len(lines)
+
+def history_end(path=HISTORY_PATH):
+    """Byte offset just past the last complete line in the history file"""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(end - 4096, 0)
+            f.seek(start)
+            chunk = f.read(end - start)
+            i = chunk.rfind(b"\n")
+            if i != -1:
+                return start + i + 1
+            end = start
+    return 0
+
+def iter_history(path=HISTORY_PATH, search_query="", filter_date=None, start=0, end=None):
+    """Stream articles from the history file between two byte offsets"""
+    if not os.path.exists(path):
+        return
+    end = history_end(path) if end is None else end
+    with open(path, "rb") as f:
+        f.seek(start)
+        while f.tell() < end:
+            line = f.readline()
+            try:
+                row = json.loads(line)
+                pub_time = datetime.fromisoformat(row['published'])
+                keep = matches_filters(row['title'], row['summary'], pub_time, search_query, filter_date)
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue
+            if keep:
+                yield row
+
+def batched(iterable, size=BATCH_SIZE):
+    it = iter(iterable)
+    while batch := list(islice(it, size)):
+        yield batch
+
+# ------------------ WRITERS ------------------
+class JsonlWriter:
+    def __init__(self, path):
+        self.f = open(path, "w", encoding="utf-8")
+
+    def write(self, rows):
+        for row in rows:
+            self.f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.f.close()
+
+class CsvWriter:
+    def __init__(self, path):
+        self.f = open(path, "w", encoding="utf-8", newline="")
+        self.writer = csv.DictWriter(self.f, fieldnames=FIELDS, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.f.close()
+
+class ParquetWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        self.pa = pa
+        self.schema = pa.schema([(name, pa.string()) for name in FIELDS])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        columns = {name: [row.get(name) for row in rows] for name in FIELDS}
+        self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+# ------------------ EXPORT ------------------
+def load_state(path=STATE_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+def state_key(consumer="nightly", search_query="", filter_date=None):
+    """Each consumer and search/date combination keeps its own incremental position"""
+    return json.dumps([consumer, search_query.lower(), filter_date.isoformat() if filter_date else None])
+
+def default_output(fmt):
+    stamp = datetime.now(IST).strftime("%Y%m%d-%H%M%S")
+    suffix = uuid.uuid4().hex[:8]  # Concurrent exports in the same second get distinct files
+    return os.path.join(EXPORT_DIR, f"news-{stamp}-{suffix}.{fmt}")
+
+def export_articles(fmt="jsonl", output=None, search_query="", filter_date=None,
+                    incremental=True, consumer="nightly", batch_size=BATCH_SIZE,
+                    history_path=HISTORY_PATH, state_path=STATE_PATH):
+    """Stream history to a file in fixed-size batches. Returns (output path, article count).
+
+    Incremental exports start where the previous export by the same consumer
+    with the same filters stopped, and advance that position only after the
+    output file is fully written. A UI export or a filtered export therefore
+    never skips rows for the nightly job.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    output = output or default_output(fmt)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+
+    key = state_key(consumer, search_query, filter_date)
+    state = load_state(state_path) if incremental else {}
+    end = history_end(history_path)
+    start = state.get(key, {}).get("offset", 0)
+    if start > end:
+        start = 0  # History was truncated or rotated; start over
+    count = 0
+
+    writer = WRITERS[fmt](output)
+    try:
+        rows = iter_history(history_path, search_query, filter_date, start, end)
+        for batch in batched(rows, batch_size):
+            writer.write(batch)
+            count += len(batch)
+    finally:
+        writer.close()
+
+    if incremental:
+        state = load_state(state_path)
+        state[key] = {
+            "offset": end,
+            "exported_at": datetime.now(IST).isoformat(),
+        }
+        save_state(state, state_path)
+    return output, count
+
+# ------------------ CLI ------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export article history")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--output", help="Output file (default: exports/news-<timestamp>-<id>.<format>)")
+    parser.add_argument("--search", default="", help="Keep articles whose title/summary contain this text")
+    parser.add_argument("--date", type=date.fromisoformat, help="Keep articles published on this date (YYYY-MM-DD, IST)")
+    parser.add_argument("--full", action="store_true", help="Export everything instead of only articles since the last export")
+    parser.add_argument("--consumer", default="nightly", help="Name of the incremental position to use (default: nightly)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    output, count = export_articles(
+        fmt=args.format,
+        output=args.output,
+        search_query=args.search,
+        filter_date=args.date,
+        incremental=not args.full,
+        consumer=args.consumer,
+        batch_size=args.batch_size,
+    )
+    print(f"Exported {count} articles to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import csv
+import json
+from datetime import date, datetime
+
+import pytest
+
+import export
+
+
+def make_articles(n, start=0):
+    return [{
+        'link': f"https://example.com/{i}",
+        'title': f"Story {i} India" if i % 2 else f"Story {i}",
+        'summary': "summary",
+        'source': "EXAMPLE",
+        'category': "General",
+        'sentiment': "⚪ Neutral",
+        'time': datetime(2024, 1, 31 if i % 3 else 30, 12, tzinfo=export.IST),
+    } for i in range(start, start + n)]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {
+        'history_path': str(tmp_path / "history.jsonl"),
+        'state_path': str(tmp_path / "state.json"),
+    }
+
+
+def run(tmp_path, paths, name, **kwargs):
+    return export.export_articles(output=str(tmp_path / name), **paths, **kwargs)
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_matches_filters():
+    pub = datetime(2024, 1, 31, 9, tzinfo=export.IST)
+    assert export.matches_filters("Budget", "India growth", pub, "INDIA")
+    assert not export.matches_filters("Budget", "growth", pub, "india")
+    assert export.matches_filters("Budget", "", pub, filter_date=date(2024, 1, 31))
+    assert not export.matches_filters("Budget", "", pub, filter_date=date(2024, 1, 30))
+
+
+def test_incremental_export_only_returns_new_rows(tmp_path, paths):
+    export.record_articles(make_articles(4), "Global", paths['history_path'])
+    assert run(tmp_path, paths, "a.jsonl")[1] == 4
+    assert run(tmp_path, paths, "b.jsonl")[1] == 0
+
+    export.record_articles(make_articles(2, start=4), "India", paths['history_path'])
+    _, count = run(tmp_path, paths, "c.jsonl")
+    assert count == 2
+    assert [r['cluster'] for r in read_jsonl(tmp_path / "c.jsonl")] == ["India", "India"]
+
+
+def test_filtered_export_does_not_consume_unfiltered_rows(tmp_path, paths):
+    export.record_articles(make_articles(6), "Global", paths['history_path'])
+    assert run(tmp_path, paths, "f.jsonl", search_query="india")[1] == 3
+    assert run(tmp_path, paths, "f2.jsonl", search_query="india")[1] == 0
+    assert run(tmp_path, paths, "d.jsonl", filter_date=date(2024, 1, 30))[1] == 2
+    assert run(tmp_path, paths, "all.jsonl")[1] == 6
+
+
+def test_full_export_ignores_and_keeps_state(tmp_path, paths):
+    export.record_articles(make_articles(3), "Global", paths['history_path'])
+    run(tmp_path, paths, "a.jsonl")
+    assert run(tmp_path, paths, "full.jsonl", incremental=False)[1] == 3
+    assert run(tmp_path, paths, "b.jsonl")[1] == 0
+
+
+def test_truncated_history_starts_over(tmp_path, paths):
+    export.record_articles(make_articles(5), "Global", paths['history_path'])
+    run(tmp_path, paths, "a.jsonl")
+    open(paths['history_path'], "w").close()
+    export.record_articles(make_articles(1, start=100), "Global", paths['history_path'])
+    assert run(tmp_path, paths, "b.jsonl")[1] == 1
+
+
+def test_partial_and_invalid_lines_are_skipped(tmp_path, paths):
+    export.record_articles(make_articles(2), "Global", paths['history_path'])
+    with open(paths['history_path'], "a", encoding="utf-8") as f:
+        f.write("not json\n[1, 2]\n{\"link\": \"x\"}\n"
+                "{\"link\": \"y\", \"published\": \"2024-01-31T12:00:00+05:30\"}\n"
+                "{\"link\": \"z\", \"published\": 5}\n{\"link\": \"half")
+    assert run(tmp_path, paths, "a.jsonl")[1] == 2
+
+    with open(paths['history_path'], "a", encoding="utf-8") as f:
+        f.write("\"}\n")
+    assert run(tmp_path, paths, "b.jsonl")[1] == 0
+
+
+def test_csv_export_in_batches(tmp_path, paths):
+    export.record_articles(make_articles(7), "Markets", paths['history_path'])
+    output, count = run(tmp_path, paths, "out.csv", fmt="csv", batch_size=2)
+    with open(output, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert count == len(rows) == 7
+    assert rows[0]['sentiment'] == "Neutral"
+    assert list(rows[0]) == export.FIELDS
+
+
+def test_batched():
+    assert list(export.batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(export.batched([], 2)) == []
+
+
+def test_unknown_format(tmp_path, paths):
+    with pytest.raises(ValueError):
+        run(tmp_path, paths, "out.xml", fmt="xml")
+
+
+def test_record_articles_dedupes_within_window(tmp_path, paths, monkeypatch):
+    monkeypatch.setattr(export, "RECENT_LINKS", 3)
+    assert export.record_articles(make_articles(3), "Global", paths['history_path']) == 3
+    assert export.record_articles(make_articles(3), "Global", paths['history_path']) == 0
+    assert export.record_articles(make_articles(2, start=3), "Global", paths['history_path']) == 2
+    assert len(export._recent_links[paths['history_path']]) == 3
+
+
+def test_record_articles_reloads_recent_links_from_history(tmp_path, paths):
+    export.record_articles(make_articles(3), "Global", paths['history_path'])
+    export._recent_links.clear()  # Simulate a restart
+    assert export.record_articles(make_articles(4), "Global", paths['history_path']) == 1
+
+
+def test_concurrent_record_articles(tmp_path, paths):
+    from concurrent.futures import ThreadPoolExecutor
+
+    batches = [make_articles(50, start=0) for _ in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        counts = list(pool.map(lambda b: export.record_articles(b, "Global", paths['history_path']), batches))
+    assert sum(counts) == 50
+    assert len(read_jsonl(paths['history_path'])) == 50
+
+
+def test_default_output_is_unique():
+    assert export.default_output("csv") != export.default_output("csv")
+
+
+def test_consumers_keep_separate_positions(tmp_path, paths):
+    export.record_articles(make_articles(5), "Global", paths['history_path'])
+    assert run(tmp_path, paths, "ui.jsonl", consumer="ui")[1] == 5
+    assert run(tmp_path, paths, "ui2.jsonl", consumer="ui")[1] == 0
+    assert run(tmp_path, paths, "nightly.jsonl")[1] == 5
+
+
+def test_cli_consumer_option(tmp_path, paths, monkeypatch, capsys):
+    export.record_articles(make_articles(2), "Global", paths['history_path'])
+    assert run(tmp_path, paths, "ui.jsonl", consumer="ui")[1] == 2
+
+    real_export = export.export_articles
+    monkeypatch.setattr(export, "export_articles", lambda **kwargs: real_export(**kwargs, **paths))
+    output = str(tmp_path / "cli.jsonl")
+    export.main(["--output", output])
+    assert "Exported 2 articles" in capsys.readouterr().out
+    export.main(["--output", output, "--consumer", "ui"])
+    assert "Exported 0 articles" in capsys.readouterr().out
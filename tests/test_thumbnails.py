@@ -0,0 +1,158 @@
+import os
+import socket
+
+import pytest
+
+import thumbnails
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(thumbnails, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(thumbnails, "_cache_bytes", None)
+    return tmp_path
+
+
+def write_file(path, size, mtime):
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+
+
+def test_extract_url_prefers_media_thumbnail():
+    entry = {
+        'media_thumbnail': [{'url': "https://img.example.com/t.jpg"}],
+        'media_content': [{'url': "https://img.example.com/c.jpg"}],
+    }
+    assert thumbnails.extract_url(entry) == "https://img.example.com/t.jpg"
+
+
+def test_extract_url_media_content_and_enclosure():
+    entry = {
+        'media_content': [{'url': "https://example.com/v.mp4", 'medium': "video"}],
+        'links': [
+            {'rel': "alternate", 'href': "https://example.com/story"},
+            {'rel': "enclosure", 'type': "image/jpeg", 'href': "https://example.com/e.jpg"},
+        ],
+    }
+    assert thumbnails.extract_url(entry) == "https://example.com/e.jpg"
+    assert thumbnails.extract_url({}) is None
+
+
+@pytest.mark.parametrize("url", [
+    "file:///etc/passwd",
+    "ftp://example.com/a.jpg",
+    "javascript:alert(1)",
+    "//example.com/a.jpg",
+])
+def test_extract_url_rejects_non_http(url):
+    assert thumbnails.extract_url({'media_thumbnail': [{'url': url}]}) is None
+
+
+def test_extract_url_skips_bad_candidate():
+    entry = {
+        'media_thumbnail': [{'url': "file:///etc/passwd"}],
+        'media_content': [{'url': "http://example.com/c.jpg"}],
+    }
+    assert thumbnails.extract_url(entry) == "http://example.com/c.jpg"
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/a.jpg",
+    "http://localhost/a.jpg",
+    "http://10.0.0.5/a.jpg",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::1]/a.jpg",
+])
+def test_opener_refuses_private_hosts(url):
+    with pytest.raises(OSError, match="public address"):
+        thumbnails._opener.open(url, timeout=1)
+
+
+def test_connect_public_checks_the_address_it_connects_to(monkeypatch):
+    answers = iter([
+        [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", 80))],
+        [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("93.184.216.34", 80))],
+    ])
+    monkeypatch.setattr(thumbnails.socket, "getaddrinfo", lambda *args, **kwargs: next(answers))
+    with pytest.raises(ConnectionRefusedError):
+        thumbnails._connect_public(("rebind.example.com", 80), 1)
+
+
+def test_evict_removes_least_recently_used(cache_dir, monkeypatch):
+    monkeypatch.setattr(thumbnails, "CACHE_MAX_BYTES", 25)
+    for i in range(5):
+        write_file(cache_dir / f"{i}.jpg", 10, mtime=1000 + i)
+    os.utime(cache_dir / "0.jpg")  # Recently used
+    (cache_dir / "other.tmp").write_bytes(b"x" * 100)
+
+    thumbnails._evict()
+
+    assert sorted(p.name for p in cache_dir.glob("*.jpg")) == ["0.jpg", "4.jpg"]
+    assert thumbnails._cache_bytes == 20
+
+
+def test_evict_keeps_cache_under_cap(cache_dir, monkeypatch):
+    monkeypatch.setattr(thumbnails, "CACHE_MAX_BYTES", 100)
+    for i in range(3):
+        write_file(cache_dir / f"{i}.jpg", 10, mtime=1000 + i)
+    thumbnails._evict()
+    assert len(list(cache_dir.glob("*.jpg"))) == 3
+    assert thumbnails._cache_bytes == 30
+
+
+def test_evict_trims_to_low_water_mark(cache_dir, monkeypatch):
+    monkeypatch.setattr(thumbnails, "CACHE_MAX_BYTES", 100)
+    for i in range(11):
+        write_file(cache_dir / f"{i}.jpg", 10, mtime=1000 + i)
+    thumbnails._evict()
+    assert sorted(p.name for p in cache_dir.glob("*.jpg")) == sorted(f"{i}.jpg" for i in range(2, 11))
+    assert thumbnails._cache_bytes == 90
+
+
+def test_request_skips_recent_failures(cache_dir, monkeypatch):
+    monkeypatch.setattr(thumbnails, "AVAILABLE", True)
+    monkeypatch.setattr(thumbnails, "_failed", thumbnails.OrderedDict())
+    submitted = []
+    monkeypatch.setattr(thumbnails._executor, "submit", lambda fn, url: submitted.append(url))
+    url = "https://example.com/a.jpg"
+
+    thumbnails._failed[url] = thumbnails.time.monotonic()
+    assert thumbnails.request(url) is None
+
+    thumbnails._failed[url] -= thumbnails.RETRY_AFTER + 1
+    thumbnails.request(url)
+    assert submitted == [url]
+    thumbnails._pending.discard(url)
+
+
+def test_request_ignores_non_http(monkeypatch):
+    monkeypatch.setattr(thumbnails, "AVAILABLE", True)
+    assert thumbnails.request("file:///etc/passwd") is None
+
+
+def test_download_resizes_and_accounts_overwrites(cache_dir, monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    import io
+
+    buf = io.BytesIO()
+    Image.new("RGB", (1600, 900), "red").save(buf, "JPEG")
+
+    class Response(io.BytesIO):
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.close()
+
+    monkeypatch.setattr(thumbnails, "_check_url", lambda url: None)
+    monkeypatch.setattr(thumbnails._opener, "open", lambda req, timeout: Response(buf.getvalue()))
+    monkeypatch.setattr(thumbnails, "_cache_bytes", 0)
+    url = "https://example.com/big.jpg"
+
+    thumbnails._download(url)
+    size = os.path.getsize(thumbnails.cache_path(url))
+    with Image.open(thumbnails.cache_path(url)) as img:
+        assert img.width <= 160 and img.height <= 90
+    thumbnails._download(url)
+    assert thumbnails._cache_bytes == size
+    assert url not in thumbnails._failed
@@ -0,0 +1,255 @@
+"""Feed thumbnails: background download, resize and a size-capped LRU disk cache.
+
+Images are fetched once per URL by a small worker pool, shrunk to THUMB_SIZE
+and stored as JPEG. Cards embed the cached file, so viewers never load the
+publisher's full-size image. Needs Pillow; without it thumbnails are disabled.
+"""
+import base64
+import hashlib
+import http.client
+import io
+import ipaddress
+import os
+import socket
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# ------------------ CONFIG ------------------
+CACHE_DIR = os.path.join(os.environ.get("NEWS_DATA_DIR", "data"), "thumbnails")
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+CACHE_LOW_WATER = 0.9  # Eviction trims to this fraction of the cap, so scans stay rare
+THUMB_SIZE = (160, 90)
+MAX_DOWNLOAD_BYTES = 5 * 1024 * 1024
+MAX_PIXELS = 25_000_000  # Refuse to decode anything larger (decompression bombs)
+RETRY_AFTER = 600  # Seconds before a failed URL is tried again
+MAX_FAILED = 1000
+MAX_WORKERS = 2
+MAX_PENDING = 64
+
+AVAILABLE = Image is not None
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="thumbs")
+_lock = threading.Lock()
+_pending = set()
+_failed = OrderedDict()  # URL -> time of last failure (oldest first)
+_cache_bytes = None  # Current cache size, computed on first write
+_evicting = False
+
+# ------------------ EXTRACTION ------------------
+def is_http_url(url):
+    try:
+        parsed = urllib.parse.urlparse(url)
+    except (TypeError, ValueError):
+        return False
+    return parsed.scheme in ("http", "https") and bool(parsed.hostname)
+
+def extract_url(entry):
+    """Thumbnail URL from media:thumbnail, media:content or an image enclosure (http/https only)"""
+    candidates = [thumb.get('url') for thumb in entry.get('media_thumbnail', [])]
+    candidates += [
+        media.get('url') for media in entry.get('media_content', [])
+        if media.get('medium', 'image') == 'image' and media.get('type', 'image/').startswith('image/')
+    ]
+    candidates += [
+        link.get('href') for link in entry.get('links', [])
+        if link.get('rel') == 'enclosure' and link.get('type', '').startswith('image/')
+    ]
+    for url in candidates:
+        if url and is_http_url(url):
+            return url
+    return None
+
+# ------------------ SAFE FETCHING ------------------
+def _check_url(url):
+    if not is_http_url(url):
+        raise ValueError(f"refusing to fetch {url}")
+
+def _connect_public(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+    """socket.create_connection that only connects to publicly routable addresses.
+
+    The host is resolved once and the socket connects to the exact address that
+    was checked, so a second DNS answer (rebinding) cannot point it elsewhere.
+    """
+    host, port = address
+    infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    if not infos or not all(
+        ipaddress.ip_address(info[4][0].split('%')[0]).is_global for info in infos
+    ):
+        raise ConnectionRefusedError(f"{host} does not resolve to a public address")
+
+    err = None
+    for family, socktype, proto, _, sockaddr in infos:
+        sock = socket.socket(family, socktype, proto)
+        try:
+            if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(sockaddr)
+            return sock
+        except OSError as e:
+            err = e
+            sock.close()
+    raise err
+
+class _PublicHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _connect_public
+
+class _PublicHTTPSConnection(http.client.HTTPSConnection):
+    # TLS still verifies the certificate against the original host name
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _connect_public
+
+class _PublicHTTPHandler(urllib.request.HTTPHandler):
+    def http_open(self, req):
+        return self.do_open(_PublicHTTPConnection, req)
+
+class _PublicHTTPSHandler(urllib.request.HTTPSHandler):
+    def https_open(self, req):
+        return self.do_open(_PublicHTTPSConnection, req, context=self._context)
+
+class _SafeRedirectHandler(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        _check_url(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+# No proxies: the connection must go straight to the address that was checked
+_opener = urllib.request.build_opener(
+    urllib.request.ProxyHandler({}),
+    _PublicHTTPHandler,
+    _PublicHTTPSHandler,
+    _SafeRedirectHandler,
+)
+
+# ------------------ CACHE ------------------
+def cache_path(url):
+    return os.path.join(CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".jpg")
+
+def _evict():
+    """Measure the cache and, if it is over CACHE_MAX_BYTES, drop least recently
+    used thumbnails down to CACHE_LOW_WATER of the cap.
+
+    Runs without holding _lock; only the resulting size is published under it.
+    """
+    global _cache_bytes
+    stats = []
+    try:
+        for entry in os.scandir(CACHE_DIR):
+            if not entry.name.endswith(".jpg"):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue  # Removed while scanning
+            stats.append((st.st_mtime, st.st_size, entry.path))
+    except OSError:
+        return
+    total = sum(size for _, size, _ in stats)
+    if total > CACHE_MAX_BYTES:
+        target = CACHE_MAX_BYTES * CACHE_LOW_WATER
+        for _, size, path in sorted(stats):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+    with _lock:
+        _cache_bytes = total
+
+def _download(url):
+    global _cache_bytes, _evicting
+    try:
+        _check_url(url)
+        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+        with _opener.open(req, timeout=5) as resp:
+            data = resp.read(MAX_DOWNLOAD_BYTES + 1)
+        if len(data) > MAX_DOWNLOAD_BYTES:
+            raise ValueError("image too large")
+
+        with Image.open(io.BytesIO(data)) as img:
+            # Only the header has been read so far; check size before decoding
+            if img.width * img.height > MAX_PIXELS:
+                raise ValueError("image has too many pixels")
+            img.draft("RGB", THUMB_SIZE)  # Let JPEG decode at reduced scale
+            img.thumbnail(THUMB_SIZE)
+            thumb = img.convert("RGB")
+            out = io.BytesIO()
+            thumb.save(out, "JPEG", quality=80, optimize=True)
+
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        path = cache_path(url)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(out.getvalue())
+        with _lock:
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            os.replace(tmp, path)
+            if _cache_bytes is not None:
+                _cache_bytes += len(out.getvalue()) - old_size
+            evict = not _evicting and (_cache_bytes is None or _cache_bytes > CACHE_MAX_BYTES)
+            if evict:
+                _evicting = True
+        if evict:
+            try:
+                _evict()
+            finally:
+                with _lock:
+                    _evicting = False
+    except Exception:
+        with _lock:
+            _failed.pop(url, None)
+            _failed[url] = time.monotonic()
+            while len(_failed) > MAX_FAILED:
+                _failed.popitem(last=False)
+    finally:
+        with _lock:
+            _pending.discard(url)
+
+# ------------------ PUBLIC API ------------------
+def request(url):
+    """Queue a thumbnail for download unless it is cached, queued or failed recently.
+
+    Returns the download future, or None if nothing was queued.
+    """
+    if not AVAILABLE or not url or not is_http_url(url):
+        return None
+    with _lock:
+        if url in _pending or len(_pending) >= MAX_PENDING:
+            return None
+        failed_at = _failed.get(url)
+        if failed_at is not None and time.monotonic() - failed_at < RETRY_AFTER:
+            return None
+        if os.path.exists(cache_path(url)):
+            return None
+        _pending.add(url)
+    return _executor.submit(_download, url)
+
+def get_data_uri(url):
+    """Cached thumbnail as a data: URI (None if not downloaded yet)"""
+    if not AVAILABLE or not url:
+        return None
+    path = cache_path(url)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # Mark as recently used for LRU eviction
+    except OSError:
+        return None
+    return "data:image/jpeg;base64," + base64.b64encode(data).decode("ascii")